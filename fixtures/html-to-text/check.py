@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+check.py - sanitize-output's streaming html_to_text vs the regex converter
+it replaced
+
+Usage:
+  python3 fixtures/html-to-text/check.py [--fuzz N] [--seed S]
+
+every *.html here is converted whole, byte-by-byte and in random chunk
+sizes, plus a large page built from the fixtures; --fuzz adds N random
+documents drawn from tag/entity/whitespace fragments. exits 1 on the
+first mismatch.
+"""
+import os
+import random
+import re
+import sys
+from importlib.machinery import SourceFileLoader
+from importlib.util import module_from_spec, spec_from_loader
+
+HERE = os.path.dirname(os.path.realpath(__file__))
+HOOK = os.path.join(HERE, "..", "..", "hooks", "sanitize-output.py")
+
+FRAGMENTS = [
+    "<", ">", "&", ";", "<p>", "</p>", "<br>", "</div>", "</h3 x>", "</pre>", "<hr/>",
+    "<script>", "</script>", "<SCRIPT a=1>", "</ScRiPt>", "<style>", "</style>",
+    "<scripts>", "<a href='x>y'>", "<!-- c > d -->", "<>", "<<", "&amp;", "&amp",
+    "&lt;", "&gt;", "&quot;", "&#39;", "&#39", "&nbsp;", "&amp;lt;", "&foo", "&copy;",
+    " ", "  ", "\t", "\n", "\n\n\n", "\r\n", "\f", "\xa0", "text", "x", "İ", "ſ",
+]
+
+def legacy_html_to_text(html):
+    """sanitize-output's converter before user-031, verbatim"""
+    # remove script and style blocks entirely
+    text = re.sub(r'<script[^>]*>.*?</script>', '', html, flags=re.DOTALL | re.IGNORECASE)
+    text = re.sub(r'<style[^>]*>.*?</style>', '', text, flags=re.DOTALL | re.IGNORECASE)
+    # convert common block elements to newlines
+    text = re.sub(r'<(br|hr|/p|/div|/h[1-6]|/li|/tr)[^>]*>', '\n', text, flags=re.IGNORECASE)
+    # strip remaining tags
+    text = re.sub(r'<[^>]+>', ' ', text)
+    # decode common HTML entities
+    text = text.replace('&amp;', '&').replace('&lt;', '<').replace('&gt;', '>')
+    text = text.replace('&quot;', '"').replace('&#39;', "'").replace('&nbsp;', ' ')
+    # collapse whitespace
+    text = re.sub(r'[ \t]+', ' ', text)
+    text = re.sub(r'\n[ \t]+', '\n', text)
+    text = re.sub(r'\n{3,}', '\n\n', text)
+    return text.strip()
+
+def load_hook():
+    loader = SourceFileLoader("sanitize_output", HOOK)
+    module = module_from_spec(spec_from_loader(loader.name, loader))
+    loader.exec_module(module)
+    return module
+
+def streamed(hook, html, sizes):
+    extractor = hook.HTMLTextExtractor()
+    i = 0
+    while i < len(html):
+        n = next(sizes)
+        extractor.feed(html[i:i + n])
+        i += n
+    extractor.close()
+    return extractor.text
+
+def check(hook, name, html, rng):
+    expected = legacy_html_to_text(html)
+    runs = [("whole", hook.html_to_text(html))]
+    if len(html) < 20000:
+        runs.append(("1-char", streamed(hook, html, iter(lambda: 1, None))))
+    for n in (7, 64 * 1024):
+        runs.append((f"{n}-char", streamed(hook, html, iter(lambda n=n: n, None))))
+    runs.append(("random", streamed(hook, html, iter(lambda: rng.randint(1, 300), None))))
+    for how, got in runs:
+        if got != expected:
+            at = next((i for i, (a, b) in enumerate(zip(got, expected)) if a != b),
+                      min(len(got), len(expected)))
+            print(f"MISMATCH {name} ({how}) at char {at}")
+            print(f"  input:    {html[:200]!r}")
+            print(f"  expected: {expected[max(0, at - 40):at + 40]!r}")
+            print(f"  got:      {got[max(0, at - 40):at + 40]!r}")
+            return False
+    return True
+
+def main():
+    args = sys.argv[1:]
+    fuzz = int(args[args.index("--fuzz") + 1]) if "--fuzz" in args else 0
+    rng = random.Random(int(args[args.index("--seed") + 1]) if "--seed" in args else 0)
+    hook = load_hook()
+
+    fixtures = {}
+    for name in sorted(os.listdir(HERE)):
+        if name.endswith(".html"):
+            with open(os.path.join(HERE, name), encoding="utf-8", newline="") as f:
+                fixtures[name] = f.read()
+    # an spa-sized page: the closed fixtures, many times over
+    fixtures["large (generated)"] = "".join(
+        fixtures[n] for n in sorted(fixtures) if n != "unclosed.html") * 400
+
+    ok = all([check(hook, name, html, rng) for name, html in fixtures.items()])
+    for i in range(fuzz):
+        html = "".join(rng.choice(FRAGMENTS) for _ in range(rng.randint(0, 60)))
+        ok = check(hook, f"fuzz #{i}", html, rng) and ok
+        if not ok:
+            break
+    print(f"{len(fixtures)} fixture(s), {fuzz} fuzz case(s): {'ok' if ok else 'FAILED'}")
+    sys.exit(0 if ok else 1)
+
+if __name__ == "__main__":
+    main()
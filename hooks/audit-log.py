@@ -2,35 +2,47 @@
 """
 audit log - logs all tool calls for compliance/debugging
 runs on PostToolUse
+
+tool_input is copied into the log as the raw json it arrived as
+(hooklib.HookInput), so big Write/Edit bodies aren't decoded and re-encoded.
+
+no latency budget: there is nothing to cancel, and a deadline could only
+drop the record.
 """
 import json
 import sys
 import os
 from datetime import datetime
 
+sys.path.insert(0, os.path.dirname(os.path.realpath(__file__)))
+from hooklib import HookInput, append_line
+
 LOG_FILE = os.path.expanduser("~/.claude/audit.jsonl")
 
 def main():
     try:
-        input_data = json.load(sys.stdin)
+        input_data = HookInput.read()
+        session_id = input_data.get("session_id", "unknown")
+        tool_name = input_data.get("tool_name", "unknown")
+        cwd = input_data.get("cwd", "unknown")
+        tool_input = input_data.raw("tool_input") or b"{}"
+        # one line per entry, even if the input arrived pretty-printed
+        if b"\n" in tool_input or b"\r" in tool_input:
+            tool_input = json.dumps(json.loads(tool_input)).encode()
     except:
         sys.exit(0)
 
-    # extract relevant info
-    entry = {
+    # same fields and order as before, tool_input spliced in undecoded
+    head = json.dumps({
         "timestamp": datetime.utcnow().isoformat() + "Z",
-        "session_id": input_data.get("session_id", "unknown"),
-        "tool_name": input_data.get("tool_name", "unknown"),
-        "tool_input": input_data.get("tool_input", {}),
-        "cwd": input_data.get("cwd", "unknown"),
-    }
+        "session_id": session_id,
+        "tool_name": tool_name,
+    })
+    tail = json.dumps({"cwd": cwd})
+    line = head[:-1].encode() + b', "tool_input": ' + tool_input + b", " + tail[1:].encode()
 
-    # append to log file
-    try:
-        with open(LOG_FILE, "a") as f:
-            f.write(json.dumps(entry) + "\n")
-    except:
-        pass  # silent fail - don't break claude over logging
+    # append to log file (silent fail - don't break claude over logging)
+    append_line(LOG_FILE, line)
 
     sys.exit(0)
 
@@ -8,7 +8,9 @@ STATE_DIR="/tmp/due-diligence"
 mkdir -p "$STATE_DIR"
 
 SESSION_ID="${CLAUDE_SESSION_ID:-$PPID}"
-STATE_FILE="$STATE_DIR/$SESSION_ID.json"
+# iteration counter lives in the shared state store (atomic across sessions)
+STATE="$(dirname "$0")/sessionstate.py"
+STATE_KEY="due-diligence.iteration"
 PROMPT_FILE="$STATE_DIR/${SESSION_ID}-prompt"
 CHECKLIST_LOG="$HOME/.claude/logs/due-diligence"
 
@@ -51,7 +53,8 @@ if echo "$LAST_MESSAGE" | grep -q "Due Diligence Checklist" && \
      echo "$LAST_MESSAGE" | sed -n '/## Due Diligence Checklist/,/All items verified complete/p' > "$LOG_FILE"
 
      # cleanup state
-     rm -f "$STATE_FILE" "$PROMPT_FILE" 2>/dev/null || true
+     python3 "$STATE" del "$SESSION_ID" "$STATE_KEY" || true
+     rm -f "$PROMPT_FILE" 2>/dev/null || true
 
      echo "{\"stopReason\": \"[Due Diligence] Verified. Log saved to $LOG_FILE\"}"
      exit 0
@@ -59,23 +62,17 @@ if echo "$LAST_MESSAGE" | grep -q "Due Diligence Checklist" && \
 fi
 
 # --- TRACK ITERATIONS ---
-if [[ -f "$STATE_FILE" ]]; then
-  ITERATION=$(jq -r '.iteration // 0' "$STATE_FILE")
-else
-  ITERATION=0
-fi
-ITERATION=$((ITERATION + 1))
+ITERATION=$(python3 "$STATE" incr "$SESSION_ID" "$STATE_KEY")
 
 MAX_ITERATIONS="${DUE_DILIGENCE_MAX:-10}"
 
 if [[ "$ITERATION" -ge "$MAX_ITERATIONS" ]]; then
-  rm -f "$STATE_FILE" "$PROMPT_FILE" 2>/dev/null || true
+  python3 "$STATE" del "$SESSION_ID" "$STATE_KEY" || true
+  rm -f "$PROMPT_FILE" 2>/dev/null || true
   echo '{"stopReason": "[Due Diligence] Max iterations reached. Exiting without full verification."}'
   exit 0
 fi
 
-echo "{\"iteration\": $ITERATION}" > "$STATE_FILE"
-
 # --- LOAD ORIGINAL PROMPT ---
 ORIGINAL_PROMPT=""
 if [[ -f "$PROMPT_FILE" ]]; then
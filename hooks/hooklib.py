@@ -0,0 +1,373 @@
+#!/usr/bin/env python3
+"""
+hooklib - shared helpers for the python hooks
+
+lazy input: HookInput reads the payload as bytes and walks only the
+top-level object, recording where each value starts and ends without
+decoding it. envelope fields (tool_name, session_id, cwd, transcript_path)
+come first, so looking them up stops before tool_input is even reached; a
+value is json-decoded only when a handler asks for it, and stepping over a
+multi-MB Write body is a memchr walk rather than a parse.
+
+latency budgets: hooks that shell out or hit the network get a deadline.
+subprocess and network work goes through the budget so it can be
+cancelled, and a SIGALRM at the deadline kills whatever is still running
+(children included), runs the hook's fallback and exits 0 - the tool call
+proceeds and the PostToolUse layer (sanitize-post.py) stays the safety net.
+hooks with nothing to cancel stay unbudgeted: pure-CPU checks
+(safety-guard, npm-to-bun, ask-me-detector) and the two whose output must
+never be skipped (sanitize-post, audit-log).
+
+budgets (ms) come from ~/.claude/hook-budgets.json, e.g.
+    {"default": 1000, "sanitize-output": 3000}
+CLAUDE_HOOK_BUDGET_MS overrides all of them.
+
+overruns are always appended to ~/.claude/logs/hook-perf.jsonl; set
+CLAUDE_HOOK_PERF=1 to log a span for every hook run as well.
+
+    python3 hooklib.py report     per-hook runs, overruns and latency
+"""
+import atexit
+import json
+import os
+import re
+import signal
+import subprocess
+import sys
+import time
+import urllib.request
+from datetime import datetime, timezone
+
+BUDGETS_FILE = os.path.expanduser("~/.claude/hook-budgets.json")
+PERF_LOG = os.path.expanduser("~/.claude/logs/hook-perf.jsonl")
+
+DEFAULT_BUDGET_MS = 1000
+
+def load_budget_ms(hook, default_ms):
+    env = os.environ.get("CLAUDE_HOOK_BUDGET_MS")
+    if env:
+        try:
+            return float(env)
+        except ValueError:
+            pass
+    try:
+        with open(BUDGETS_FILE) as f:
+            budgets = json.load(f)
+        return float(budgets.get(hook, budgets.get("default", default_ms)))
+    except (OSError, ValueError, TypeError, AttributeError):
+        return default_ms
+
+def append_line(path, data):
+    """one O_APPEND write per line so concurrent hooks don't interleave"""
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd = os.open(path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        try:
+            os.write(fd, data + b"\n")
+        finally:
+            os.close(fd)
+    except OSError:
+        pass  # never break a hook over logging
+
+def append_jsonl(path, entry):
+    append_line(path, json.dumps(entry).encode())
+
+# ─────────────────────────────────────────────────────────────
+# Lazy input
+# ─────────────────────────────────────────────────────────────
+
+WHITESPACE = re.compile(rb"[ \t\r\n]*")
+STRUCTURE = re.compile(rb'["{}\[\]]')
+SCALAR = re.compile(rb"[^,}\]\s]+")
+ESCAPED_QUOTES = 32
+BACKSLASH = 0x5c
+
+def string_end(raw, pos, text):
+    """
+    offset just past the json string opening at pos. memchr hops from quote
+    to quote; once a string turns out to be full of escaped quotes (code,
+    nested json) json's C scanner finishes it on text(), a latin-1 view of
+    raw whose offsets match the bytes.
+    """
+    find, p = raw.find, pos + 1
+    for _ in range(ESCAPED_QUOTES):
+        q = find(b'"', p)
+        if q < 0:
+            raise ValueError(f"unterminated string at {pos}")
+        b = q
+        while raw[b - 1] == BACKSLASH:
+            b -= 1
+        if (q - b) % 2 == 0:
+            return q + 1
+        p = q + 1
+    return json.decoder.scanstring(text(), p)[1]
+
+def value_end(raw, pos, text):
+    """offset just past the json value starting at pos, without decoding it"""
+    first = raw[pos:pos + 1]
+    if first == b'"':
+        return string_end(raw, pos, text)
+    if first in (b"{", b"["):
+        depth, p = 0, pos
+        while True:
+            m = STRUCTURE.search(raw, p)
+            if not m:
+                raise ValueError(f"unterminated container at {pos}")
+            c = m.group()
+            if c == b'"':
+                p = string_end(raw, m.start(), text)
+                continue
+            depth += 1 if c in (b"{", b"[") else -1
+            p = m.end()
+            if not depth:
+                return p
+    m = SCALAR.match(raw, pos)
+    if not m:
+        raise ValueError(f"malformed json value at {pos}")
+    return m.end()
+
+class HookInput:
+    """
+    hook payload with lazily decoded fields:
+
+        hook_input = HookInput.read()         # ValueError if not an object
+        hook_input.get("tool_name")           # scans only as far as needed
+        hook_input.get("tool_input", {})      # decoded on first use
+        hook_input.raw("tool_input")          # the undecoded json bytes
+    """
+
+    def __init__(self, raw):
+        self.data = raw
+        self.spans = {}
+        self.values = {}
+        self.walker = self._walk()
+        self.latin1 = None
+
+    @classmethod
+    def read(cls, stream=None):
+        return cls((stream or sys.stdin.buffer).read())
+
+    def _text(self):
+        if self.latin1 is None:
+            self.latin1 = self.data.decode("latin-1")
+        return self.latin1
+
+    def _walk(self):
+        raw = self.data
+        pos = WHITESPACE.match(raw, 0).end()
+        if raw[pos:pos + 1] != b"{":
+            raise ValueError("hook input is not a json object")
+        pos += 1
+        while True:
+            pos = WHITESPACE.match(raw, pos).end()
+            c = raw[pos:pos + 1]
+            if c == b"}" or not c:
+                return
+            if c == b",":
+                pos += 1
+                continue
+            if c != b'"':
+                raise ValueError(f"malformed json key at {pos}")
+            end = string_end(raw, pos, self._text)
+            key = json.loads(raw[pos:end])
+            pos = WHITESPACE.match(raw, end).end()
+            if raw[pos:pos + 1] != b":":
+                raise ValueError(f"missing ':' at {pos}")
+            start = WHITESPACE.match(raw, pos + 1).end()
+            pos = value_end(raw, start, self._text)
+            self.spans.setdefault(key, (start, pos))
+            yield key
+
+    def _find(self, key):
+        if key not in self.spans:
+            for found in self.walker:
+                if found == key:
+                    break
+        return self.spans.get(key)
+
+    def raw(self, key):
+        span = self._find(key)
+        return self.data[span[0]:span[1]] if span else None
+
+    def get(self, key, default=None):
+        if key not in self.values:
+            raw = self.raw(key)
+            if raw is None:
+                return default
+            self.values[key] = json.loads(raw)
+        return self.values[key]
+
+    def __contains__(self, key):
+        return self._find(key) is not None
+
+# needles that survive json encoding byte for byte: printable ascii with
+# nothing a writer escapes, no separators json.dumps would respace, and not
+# purely numeric (number formatting differs between writers)
+NEEDLE_SAFE = re.compile(r'(?!.*(?:, |: ))(?![0-9.eE+-]*$)[ !#-\[\]-~]+')
+
+def may_contain(raw, needles):
+    """
+    False only if no needle can appear in any decoded string of the json
+    bytes raw (or in json.dumps of a decoded value) - a memchr pass that
+    lets hooks skip decoding output that can't match
+    """
+    for needle in needles:
+        if not NEEDLE_SAFE.fullmatch(needle) or needle.encode() in raw:
+            return True
+    return False
+
+class HookBudget:
+    """
+    deadline for one hook run. create it first thing in main():
+
+        budget = HookBudget("sanitize-output", 3000)
+        budget.run(["rg", ...])           # killed at the deadline
+        budget.urlopen(req)               # timeout = time left
+
+    fallback, if given, runs on expiry before the hook exits 0 (e.g. to
+    print a hook response); by default the hook just steps aside.
+    """
+
+    def __init__(self, hook, default_ms=DEFAULT_BUDGET_MS, fallback=None):
+        self.hook = hook
+        self.started = time.monotonic()
+        self.wall = time.time()
+        self.budget_ms = load_budget_ms(hook, default_ms)
+        self.fallback = fallback
+        self.children = []
+        self.context = {}
+        self.expired = False
+        if self.budget_ms > 0 and hasattr(signal, "setitimer"):
+            signal.signal(signal.SIGALRM, self._on_alarm)
+            signal.setitimer(signal.ITIMER_REAL, self.budget_ms / 1000)
+        atexit.register(self._finish)
+
+    def set_context(self, **fields):
+        """session_id / tool_name etc. for the perf log"""
+        self.context.update({k: v for k, v in fields.items() if v})
+
+    def elapsed_ms(self):
+        return (time.monotonic() - self.started) * 1000
+
+    def remaining(self):
+        """seconds left, never below a small floor usable as a timeout"""
+        if self.budget_ms <= 0:
+            return None
+        return max(0.01, (self.budget_ms - self.elapsed_ms()) / 1000)
+
+    def run(self, cmd, **kwargs):
+        """subprocess.run(capture_output=True, text=True) bounded by the budget"""
+        kwargs.setdefault("stdout", subprocess.PIPE)
+        kwargs.setdefault("stderr", subprocess.PIPE)
+        kwargs.setdefault("text", True)
+        # own process group, so expiry takes out grandchildren too
+        proc = subprocess.Popen(cmd, start_new_session=True, **kwargs)
+        self.children.append(proc)
+        try:
+            out, err = proc.communicate(timeout=self.remaining())
+        except subprocess.TimeoutExpired:
+            self.expire("subprocess")
+        finally:
+            if proc in self.children and proc.poll() is not None:
+                self.children.remove(proc)
+        return subprocess.CompletedProcess(cmd, proc.returncode, out, err)
+
+    def check_output(self, cmd, **kwargs):
+        result = self.run(cmd, **kwargs)
+        if result.returncode:
+            raise subprocess.CalledProcessError(result.returncode, cmd, result.stdout, result.stderr)
+        return result.stdout
+
+    def urlopen(self, req):
+        return urllib.request.urlopen(req, timeout=self.remaining())
+
+    def spawn(self, cmd, **kwargs):
+        """fire-and-forget: detached, outlives the hook, not counted"""
+        kwargs.setdefault("stdin", subprocess.DEVNULL)
+        kwargs.setdefault("stdout", subprocess.DEVNULL)
+        kwargs.setdefault("stderr", subprocess.DEVNULL)
+        try:
+            return subprocess.Popen(cmd, start_new_session=True, **kwargs)
+        except OSError:
+            return None
+
+    def _on_alarm(self, signum, frame):
+        self.expire("deadline")
+
+    def expire(self, stage):
+        """out of time: cancel children, fall back, exit 0 right now"""
+        if hasattr(signal, "setitimer"):
+            signal.setitimer(signal.ITIMER_REAL, 0)
+        self.expired = True
+        for proc in self.children:
+            try:
+                os.killpg(proc.pid, signal.SIGKILL)
+            except OSError:
+                pass
+        self._record(overrun=True, stage=stage)
+        if self.fallback:
+            try:
+                self.fallback()
+            except Exception:
+                pass
+        sys.stdout.flush()
+        # os._exit: bare excepts in hooks must not swallow the exit
+        os._exit(0)
+
+    def _finish(self):
+        if self.expired:
+            return
+        if hasattr(signal, "setitimer"):
+            signal.setitimer(signal.ITIMER_REAL, 0)
+        overrun = self.budget_ms > 0 and self.elapsed_ms() > self.budget_ms
+        if overrun or os.environ.get("CLAUDE_HOOK_PERF"):
+            self._record(overrun=overrun, stage="exit")
+
+    def _record(self, overrun, stage):
+        entry = {
+            "timestamp": datetime.fromtimestamp(self.wall, timezone.utc).isoformat().replace("+00:00", "Z"),
+            "hook": self.hook,
+            "elapsed_ms": round(self.elapsed_ms(), 2),
+            "budget_ms": self.budget_ms,
+            "overrun": overrun,
+            "stage": stage,
+        }
+        entry.update(self.context)
+        append_jsonl(PERF_LOG, entry)
+
+# ─────────────────────────────────────────────────────────────
+# Report
+# ─────────────────────────────────────────────────────────────
+
+def percentile(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p))] if values else 0.0
+
+def report():
+    stats = {}
+    try:
+        with open(PERF_LOG) as f:
+            for line in f:
+                try:
+                    e = json.loads(line)
+                except ValueError:
+                    continue
+                s = stats.setdefault(e.get("hook", "?"), {"ms": [], "overruns": 0, "expired": 0})
+                s["ms"].append(e.get("elapsed_ms", 0.0))
+                s["overruns"] += bool(e.get("overrun"))
+                s["expired"] += e.get("stage") not in (None, "exit")
+    except OSError:
+        print(f"no perf log at {PERF_LOG}")
+        return
+
+    print(f"{'HOOK':<20} {'RUNS':>6} {'OVER':>6} {'KILLED':>6} {'P50':>8} {'P95':>8} {'MAX':>8}")
+    for hook, s in sorted(stats.items()):
+        ms = s["ms"]
+        print(f"{hook:<20} {len(ms):>6} {s['overruns']:>6} {s['expired']:>6} "
+              f"{percentile(ms, .5):>8.1f} {percentile(ms, .95):>8.1f} {max(ms):>8.1f}")
+
+if __name__ == "__main__":
+    if sys.argv[1:] == ["report"]:
+        report()
+    else:
+        print(__doc__.strip())
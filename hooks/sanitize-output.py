@@ -9,18 +9,37 @@ Bash: wraps command output through a python filter that reads filter
       the rewritten command).
 Grep: pre-executes rg with the same params, sanitizes output, denies
       if string found.
-WebFetch: pre-fetches URL, checks raw HTML for filter string, denies
-          with sanitized content if found.
+WebFetch: streams the URL, checks raw HTML for filter string, denies
+          with sanitized content if found. text is extracted
+          incrementally and reading stops once the output cap is hit.
 
 filter strings stored in ~/.claude/filter-string.txt (one per line).
+
+runs under a latency budget (hooklib.HookBudget, default 3s): if rg or the
+fetch runs long they are cancelled and the tool call proceeds unfiltered,
+leaving sanitize-post.py to catch it afterwards.
+
+input is parsed lazily (hooklib.HookInput): tool_name is read off the front
+of the payload and tool_input is only decoded for the four tools above, so
+Write/Edit bodies are never parsed here.
 """
+import codecs
 import json
+import re
 import sys
 import os
-import subprocess
 import urllib.request
 
+sys.path.insert(0, os.path.dirname(os.path.realpath(__file__)))
+from hooklib import HookBudget, HookInput
+
 FILTER_FILE = os.path.expanduser("~/.claude/filter-string.txt")
+BUDGET_MS = 3000
+
+WEB_TEXT_LIMIT = 30000
+WEB_CHUNK_SIZE = 64 * 1024
+# raw html held back before converting speculatively (no match yet)
+WEB_RAW_BUFFER = 1024 * 1024
 
 def load_filter_strings():
     if not os.path.exists(FILTER_FILE):
@@ -110,7 +129,7 @@ def handle_bash(tool_input, filter_strings):
 
     allow_with_updated_input({"command": filter_wrapper})
 
-def handle_grep(tool_input, filter_strings):
+def handle_grep(tool_input, filter_strings, budget):
     """Pre-execute rg with the same params, sanitize output if needed."""
     pattern = tool_input.get("pattern", "")
     if not pattern:
@@ -155,13 +174,7 @@ def handle_grep(tool_input, filter_strings):
     cmd.append(path)
 
     try:
-        result = subprocess.run(
-            cmd,
-            capture_output=True,
-            text=True,
-            timeout=30
-        )
-        output = result.stdout
+        output = budget.run(cmd).stdout
     except Exception:
         sys.exit(0)
 
@@ -181,65 +194,237 @@ def handle_grep(tool_input, filter_strings):
 
     sys.exit(0)
 
-def html_to_text(html):
+class _TagPass:
+    """
+    re.sub(r"<PREFIX[^>]*>" [+ ".*?CLOSE"], repl) over a stream. a match
+    starts at the leftmost prefix and ends at the first ">" (then, for
+    script/style, the first CLOSE). anything that could still become a
+    match is held back until more input or the end of the document.
+    """
+
+    def __init__(self, prefix, longest, repl, close=None):
+        self.start = re.compile("<" + prefix, re.IGNORECASE)
+        self.pattern = re.compile("<" + prefix + "[^>]*>", re.IGNORECASE)
+        self.longest = longest  # longest prefix match, "<" included
+        self.close = close and re.compile(close, re.IGNORECASE)
+        self.repl = repl
+        self.buf = ""
+        self.resume = 0         # where an unfinished CLOSE search got to
+
+    def feed(self, text, final=False):
+        if not self.close:
+            # every match before the last ">" is complete: one re.sub up to it
+            buf = self.buf + text
+            cut = len(buf) if final else buf.rfind(">") + 1
+            lt = buf.find("<", cut)
+            keep = len(buf) if final or lt < 0 else lt
+            self.buf = buf[keep:]
+            return self.pattern.sub(self.repl, buf[:cut]) + buf[cut:keep]
+        buf, resume = self.buf + text, self.resume
+        self.buf, self.resume = "", 0
+        out, i = [], 0
+        while True:
+            m = self.start.search(buf, i)
+            if not m:
+                keep = len(buf) if final else max(i, len(buf) - self.longest + 1)
+                out.append(buf[i:keep])
+                self.buf = buf[keep:]
+                break
+            gt = buf.find(">", m.end())
+            end = gt + 1 if gt >= 0 else -1
+            if end > 0 and self.close:
+                c = self.close.search(buf, max(end, resume))
+                end = c.end() if c else -1
+            if end < 0:
+                out.append(buf[i:m.start()] if not final else buf[i:])
+                if not final:
+                    # no ">" (or CLOSE) yet: wait, without rescanning for CLOSE
+                    self.buf = buf[m.start():]
+                    self.resume = max(0, len(buf) - m.start() - 16)
+                # and at the end, nothing later can match either
+                break
+            out.append(buf[i:m.start()])
+            out.append(self.repl)
+            i, resume = end, 0
+        return "".join(out)
+
+class _Replace:
+    """str.replace(old, new) over a stream"""
+
+    def __init__(self, old, new):
+        self.old, self.new = old, new
+        self.buf = ""
+
+    def feed(self, text, final=False):
+        buf = self.buf + text
+        cut = len(buf) if final else len(buf) - len(self.old) + 1
+        out, i = [], 0
+        while True:
+            j = buf.find(self.old, i)
+            if j < 0 or j >= cut:
+                break
+            out.append(buf[i:j])
+            out.append(self.new)
+            i = j + len(self.old)
+        cut = max(i, cut)
+        out.append(buf[i:cut])
+        self.buf = buf[cut:]
+        return "".join(out)
+
+class _Sub:
+    """re.sub over a stream; hold(buf) -> index of a tail a match could extend into"""
+
+    def __init__(self, pattern, repl, hold):
+        self.pattern, self.repl, self.hold = re.compile(pattern), repl, hold
+        self.buf = ""
+
+    def feed(self, text, final=False):
+        buf = self.buf + text
+        cut = len(buf) if final else self.hold(buf)
+        self.buf = buf[cut:]
+        return self.pattern.sub(self.repl, buf[:cut])
+
+def _hold_newline_indent(buf):
+    k = len(buf.rstrip(" \t"))
+    return k - 1 if k and buf[k - 1] == "\n" else len(buf)
+
+class _Strip:
+    """str.strip() over a stream"""
+
+    def __init__(self):
+        self.started = False
+        self.buf = ""
+
+    def feed(self, text, final=False):
+        if not self.started:
+            text = text.lstrip()
+            self.started = bool(text)
+        buf = self.buf + text
+        cut = len(buf.rstrip())
+        self.buf = "" if final else buf[cut:]
+        return buf[:cut]
+
+class HTMLTextExtractor:
+    """
+    incremental html -> readable text. feed() chunks as they arrive.
+    each stage is one step of the old whole-document regex converter,
+    streamed: script/style blocks dropped, br/hr and closing p/div/h*/li/tr
+    become newlines, other tags a space, six entities decoded, whitespace
+    collapsed, trimmed. output matches html_to_text on the whole page
+    (fixtures/html-to-text/check.py).
+    once max_chars of text exist, `full` is set and callers stop feeding.
+    """
+
+    def __init__(self, max_chars=None):
+        self.max_chars = max_chars
+        self.parts = []
+        self.length = 0
+        self.stages = [
+            _TagPass("script", 7, "", close="</script>"),
+            _TagPass("style", 6, "", close="</style>"),
+            _TagPass("(?:br|hr|/p|/div|/h[1-6]|/li|/tr)", 5, "\n"),
+            _TagPass("[^>]", 2, " "),
+            _Replace("&amp;", "&"), _Replace("&lt;", "<"), _Replace("&gt;", ">"),
+            _Replace("&quot;", '"'), _Replace("&#39;", "'"), _Replace("&nbsp;", " "),
+            _Sub(r"[ \t]+", " ", lambda buf: len(buf.rstrip(" \t"))),
+            _Sub(r"\n[ \t]+", "\n", _hold_newline_indent),
+            _Sub(r"\n{3,}", "\n\n", lambda buf: len(buf.rstrip("\n"))),
+            _Strip(),
+        ]
+
+    @property
+    def full(self):
+        return self.max_chars is not None and self.length >= self.max_chars
+
+    @property
+    def text(self):
+        return "".join(self.parts)
+
+    def feed(self, text, final=False):
+        for stage in self.stages:
+            text = stage.feed(text, final)
+        if text:
+            self.parts.append(text)
+            self.length += len(text)
+
+    def close(self):
+        self.feed("", final=True)
+
+def html_to_text(html, max_chars=None):
     """Strip HTML tags and collapse whitespace to get readable text."""
-    import re
-    # remove script and style blocks entirely
-    text = re.sub(r'<script[^>]*>.*?</script>', '', html, flags=re.DOTALL | re.IGNORECASE)
-    text = re.sub(r'<style[^>]*>.*?</style>', '', text, flags=re.DOTALL | re.IGNORECASE)
-    # convert common block elements to newlines
-    text = re.sub(r'<(br|hr|/p|/div|/h[1-6]|/li|/tr)[^>]*>', '\n', text, flags=re.IGNORECASE)
-    # strip remaining tags
-    text = re.sub(r'<[^>]+>', ' ', text)
-    # decode common HTML entities
-    text = text.replace('&amp;', '&').replace('&lt;', '<').replace('&gt;', '>')
-    text = text.replace('&quot;', '"').replace('&#39;', "'").replace('&nbsp;', ' ')
-    # collapse whitespace
-    text = re.sub(r'[ \t]+', ' ', text)
-    text = re.sub(r'\n[ \t]+', '\n', text)
-    text = re.sub(r'\n{3,}', '\n\n', text)
-    return text.strip()
-
-def handle_webfetch(tool_input, filter_strings):
-    """Pre-fetch URL, check for filter strings in response."""
+    extractor = HTMLTextExtractor(max_chars)
+    extractor.feed(html)
+    extractor.close()
+    return extractor.text
+
+def handle_webfetch(tool_input, filter_strings, budget):
+    """Stream URL, check for filter strings, convert only as much as needed."""
     url = tool_input.get("url", "")
     if not url:
         sys.exit(0)
 
+    # overlap catches filter strings split across chunk boundaries
+    overlap = max(len(fs) for fs in filter_strings) - 1
+    extractor = HTMLTextExtractor(max_chars=WEB_TEXT_LIMIT + overlap + 1)
+    decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+    held, held_size = [], 0
+    tail = ""
+    found = False
+
     try:
         req = urllib.request.Request(
             url,
             headers={"User-Agent": "Mozilla/5.0 (sanitize-hook)"}
         )
-        with urllib.request.urlopen(req, timeout=15) as resp:
-            raw = resp.read().decode("utf-8", errors="replace")
+        with budget.urlopen(req) as resp:
+            while True:
+                chunk = resp.read(WEB_CHUNK_SIZE)
+                text = decoder.decode(chunk, final=not chunk)
+
+                if not found:
+                    window = tail + text
+                    found = any(fs in window for fs in filter_strings)
+                    tail = window[-overlap:] if overlap else ""
+
+                # hold raw html until a match makes the text worth having,
+                # converting early only to keep memory bounded
+                if not extractor.full and text:
+                    held.append(text)
+                    held_size += len(text)
+                    if found or held_size > WEB_RAW_BUFFER:
+                        for piece in held:
+                            extractor.feed(piece)
+                            if extractor.full:
+                                break
+                        held, held_size = [], 0
+
+                if not chunk or (found and extractor.full):
+                    break
     except Exception:
         # can't pre-fetch, let the real tool handle it
         # PostToolUse layer is the fallback
         sys.exit(0)
 
-    _, found = sanitize(raw, filter_strings)
-
     if found:
-        # convert to readable text, then sanitize the text version
-        text = html_to_text(raw)
-        sanitized_text, _ = sanitize(text, filter_strings)
+        if not extractor.full:
+            extractor.close()
+        sanitized_text, _ = sanitize(extractor.text, filter_strings)
         # truncate if huge
-        if len(sanitized_text) > 30000:
-            sanitized_text = sanitized_text[:30000] + "\n[TRUNCATED]"
+        if extractor.full or len(sanitized_text) > WEB_TEXT_LIMIT:
+            sanitized_text = sanitized_text[:WEB_TEXT_LIMIT] + "\n[TRUNCATED]"
         deny(f"[SANITIZED - disruptive string removed from web content]\nURL: {url}\n\n{sanitized_text}")
 
     sys.exit(0)
 
 def main():
+    budget = HookBudget("sanitize-output", BUDGET_MS)
     try:
-        input_data = json.load(sys.stdin)
+        input_data = HookInput.read()
+        tool_name = input_data.get("tool_name", "")
+        budget.set_context(session_id=input_data.get("session_id"), tool_name=tool_name)
     except:
         sys.exit(0)
 
-    tool_name = input_data.get("tool_name", "")
-    tool_input = input_data.get("tool_input", {})
-
     if tool_name not in ("Read", "Bash", "Grep", "WebFetch"):
         sys.exit(0)
 
@@ -247,14 +432,19 @@ def main():
     if not filter_strings:
         sys.exit(0)
 
+    try:
+        tool_input = input_data.get("tool_input", {})
+    except ValueError:
+        sys.exit(0)
+
     if tool_name == "Read":
         handle_read(tool_input, filter_strings)
     elif tool_name == "Bash":
         handle_bash(tool_input, filter_strings)
     elif tool_name == "Grep":
-        handle_grep(tool_input, filter_strings)
+        handle_grep(tool_input, filter_strings, budget)
     elif tool_name == "WebFetch":
-        handle_webfetch(tool_input, filter_strings)
+        handle_webfetch(tool_input, filter_strings, budget)
 
     sys.exit(0)
 
@@ -7,11 +7,22 @@ for MCP tools: uses updatedMCPToolOutput to replace the response.
 for built-in tools: provides sanitized version via additionalContext.
 
 filter strings stored in ~/.claude/filter-string.txt (one per line).
+
+the payload is parsed lazily (hooklib.HookInput): when no filter string
+occurs in the raw bytes at all - nearly every call - the output is never
+decoded.
+
+no latency budget: this is the safety net the budgeted hooks fall back on,
+and there is nothing here a deadline could cancel - expiring would only
+let the unfiltered output through.
 """
 import json
 import sys
 import os
 
+sys.path.insert(0, os.path.dirname(os.path.realpath(__file__)))
+from hooklib import HookInput, may_contain
+
 FILTER_FILE = os.path.expanduser("~/.claude/filter-string.txt")
 
 def load_filter_strings():
@@ -37,18 +48,23 @@ def deep_sanitize(obj, filter_strings):
 
 def main():
     try:
-        input_data = json.load(sys.stdin)
+        input_data = HookInput.read()
+        tool_name = input_data.get("tool_name", "")
     except:
         sys.exit(0)
 
-    tool_name = input_data.get("tool_name", "")
-
     filter_strings = load_filter_strings()
     if not filter_strings:
         sys.exit(0)
 
+    if not may_contain(input_data.data, filter_strings):
+        sys.exit(0)
+
     # get tool output as string for checking
-    tool_output = input_data.get("tool_output", "")
+    try:
+        tool_output = input_data.get("tool_output", "")
+    except ValueError:
+        sys.exit(0)
     output_str = json.dumps(tool_output) if not isinstance(tool_output, str) else tool_output
 
     # check if any filter string is present
@@ -0,0 +1,286 @@
+#!/usr/bin/env python3
+"""
+sessionstate - shared per-session state for hooks and tools (sqlite, WAL)
+
+one database, ~/.claude/state.sqlite (CLAUDE_STATE_DB overrides), instead of
+/tmp json files and one file per tmux pane. every write is a transaction, so
+concurrent sessions never lose each other's updates.
+
+Usage:
+  sessionstate.py get SESSION KEY [DEFAULT]
+  sessionstate.py set SESSION KEY VALUE
+  sessionstate.py incr SESSION KEY [BY]            print the new value
+  sessionstate.py cas SESSION KEY EXPECTED NEW     exit 0 if swapped, 1 if not
+                                                   ("" = key absent)
+  sessionstate.py del SESSION [KEY]                one key, or all of a session
+  sessionstate.py pane-capture [SESSION]           map the current tmux pane (no
+                                                   SESSION: hook json on stdin)
+  sessionstate.py pane-lookup                      session for the current pane
+  sessionstate.py pane-get KEY | pane-set KEY SESSION
+  sessionstate.py pane-history [KEY] [-n N]
+  sessionstate.py gc [--days N]                    drop session state idle N days
+
+pane keys are "title:<pane title>" when the pane has a real title, else
+"<window>:<pane index>" - resolved with a single tmux call.
+
+from python:
+
+    from sessionstate import Store
+    with Store() as store:
+        n = store.incr(session_id, "due-diligence.iteration")
+"""
+import json
+import os
+import socket
+import sqlite3
+import subprocess
+import sys
+import time
+
+DB_PATH = os.environ.get("CLAUDE_STATE_DB") or os.path.expanduser("~/.claude/state.sqlite")
+LEGACY_PANE_DIR = os.path.expanduser("~/.claude/pane-sessions")
+
+STATE_TTL_DAYS = 7       # per-session keys (was: /tmp, gone on reboot)
+PANE_TTL_DAYS = 90       # pane map + history, for resuming old panes
+BUSY_TIMEOUT_MS = 5000
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS state (
+    session TEXT NOT NULL,
+    key     TEXT NOT NULL,
+    value   TEXT NOT NULL,
+    updated REAL NOT NULL,
+    PRIMARY KEY (session, key)
+);
+CREATE INDEX IF NOT EXISTS state_updated ON state(updated);
+CREATE TABLE IF NOT EXISTS panes (
+    pane    TEXT PRIMARY KEY,
+    session TEXT NOT NULL,
+    updated REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS pane_history (
+    pane    TEXT NOT NULL,
+    session TEXT NOT NULL,
+    at      REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS pane_history_pane ON pane_history(pane, at);
+"""
+
+class Store:
+    def __init__(self, path=None):
+        path = path or DB_PATH
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # autocommit; writes below open their own BEGIN IMMEDIATE
+        self.db = sqlite3.connect(path, timeout=BUSY_TIMEOUT_MS / 1000, isolation_level=None)
+        try:
+            self.db.execute("PRAGMA journal_mode=WAL")
+        except sqlite3.OperationalError:
+            pass  # another session is switching it right now
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        if not self.db.execute("SELECT 1 FROM sqlite_master WHERE name = 'pane_history'").fetchone():
+            self.db.executescript(SCHEMA)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self.db.close()
+
+    def write(self):
+        """transaction that takes the write lock up front (no upgrade deadlocks)"""
+        return _Transaction(self.db)
+
+    # ── per-session state ──
+
+    def get(self, session, key, default=None):
+        row = self.db.execute("SELECT value FROM state WHERE session = ? AND key = ?",
+                              (session, key)).fetchone()
+        return row[0] if row else default
+
+    def set(self, session, key, value):
+        with self.write():
+            self.db.execute(
+                "INSERT OR REPLACE INTO state VALUES (?, ?, ?, ?)",
+                (session, key, str(value), time.time()))
+
+    def incr(self, session, key, by=1):
+        """atomic add -> new value; a missing or non-numeric value counts as 0"""
+        with self.write():
+            current = self.get(session, key)
+            try:
+                value = int(current) + by
+            except (TypeError, ValueError):
+                value = by
+            self.db.execute(
+                "INSERT OR REPLACE INTO state VALUES (?, ?, ?, ?)",
+                (session, key, str(value), time.time()))
+        return value
+
+    def cas(self, session, key, expected, new):
+        """set key to new only if it currently holds expected (None = absent)"""
+        with self.write():
+            if self.get(session, key) != (None if expected is None else str(expected)):
+                return False
+            self.db.execute(
+                "INSERT OR REPLACE INTO state VALUES (?, ?, ?, ?)",
+                (session, key, str(new), time.time()))
+        return True
+
+    def delete(self, session, key=None):
+        with self.write():
+            if key is None:
+                self.db.execute("DELETE FROM state WHERE session = ?", (session,))
+            else:
+                self.db.execute("DELETE FROM state WHERE session = ? AND key = ?", (session, key))
+
+    # ── pane -> session map ──
+
+    def map_pane(self, pane, session):
+        """point pane at session; history only records changes"""
+        now = time.time()
+        with self.write():
+            row = self.db.execute("SELECT session FROM panes WHERE pane = ?", (pane,)).fetchone()
+            self.db.execute("INSERT OR REPLACE INTO panes VALUES (?, ?, ?)", (pane, session, now))
+            if not row or row[0] != session:
+                self.db.execute("INSERT INTO pane_history VALUES (?, ?, ?)", (pane, session, now))
+
+    def pane_session(self, pane):
+        row = self.db.execute("SELECT session FROM panes WHERE pane = ?", (pane,)).fetchone()
+        if row:
+            return row[0]
+        # mappings written before the store existed
+        try:
+            with open(os.path.join(LEGACY_PANE_DIR, pane)) as f:
+                return f.read().strip() or None
+        except OSError:
+            return None
+
+    def pane_history(self, pane=None, limit=20):
+        """[(pane, session, at)], newest first"""
+        if pane:
+            sql, args = "SELECT * FROM pane_history WHERE pane = ? ORDER BY at DESC LIMIT ?", (pane, limit)
+        else:
+            sql, args = "SELECT * FROM pane_history ORDER BY at DESC LIMIT ?", (limit,)
+        return self.db.execute(sql, args).fetchall()
+
+    # ── cleanup ──
+
+    def cleanup(self, state_days=STATE_TTL_DAYS, pane_days=PANE_TTL_DAYS):
+        """drop stale rows -> number removed"""
+        now = time.time()
+        with self.write():
+            removed = self.db.execute("DELETE FROM state WHERE updated < ?",
+                                      (now - state_days * 86400,)).rowcount
+            removed += self.db.execute("DELETE FROM panes WHERE updated < ?",
+                                       (now - pane_days * 86400,)).rowcount
+            removed += self.db.execute("DELETE FROM pane_history WHERE at < ?",
+                                       (now - pane_days * 86400,)).rowcount
+        return removed
+
+class _Transaction:
+    def __init__(self, db):
+        self.db = db
+
+    def __enter__(self):
+        self.db.execute("BEGIN IMMEDIATE")
+
+    def __exit__(self, exc_type, *exc):
+        self.db.execute("ROLLBACK" if exc_type else "COMMIT")
+
+# ─────────────────────────────────────────────────────────────
+# tmux
+# ─────────────────────────────────────────────────────────────
+
+def current_pane_key():
+    """the pane key for this process's tmux pane, or None outside tmux"""
+    if not os.environ.get("TMUX"):
+        return None
+    pane_id = os.environ.get("TMUX_PANE", "")
+    target = ["-t", pane_id] if pane_id else []
+    try:
+        out = subprocess.run(["tmux", "display-message"] + target + ["-p", "#W\t#P\t#{pane_title}"],
+                             capture_output=True, text=True, timeout=2).stdout
+        window, pane_idx, pane_title = out.rstrip("\n").split("\t")
+    except (OSError, subprocess.SubprocessError, ValueError):
+        return None
+    # prefer pane title if explicitly set (not default hostname)
+    if pane_title and pane_title not in (socket.gethostname().split(".")[0], "bash", "zsh"):
+        return f"title:{pane_title}"
+    return f"{window}:{pane_idx}"
+
+def read_hook_session():
+    try:
+        return json.load(sys.stdin).get("session_id")
+    except (ValueError, AttributeError):
+        return None
+
+# ─────────────────────────────────────────────────────────────
+# Main
+# ─────────────────────────────────────────────────────────────
+
+def usage(code=0):
+    print(__doc__.strip().split("\n\nfrom python:")[0])
+    sys.exit(code)
+
+def main():
+    args = sys.argv[1:]
+    if not args or args[0] in ("-h", "--help"):
+        usage(0 if args else 1)
+    command, rest = args[0], args[1:]
+
+    with Store() as store:
+        if command == "get" and len(rest) in (2, 3):
+            value = store.get(rest[0], rest[1], rest[2] if len(rest) == 3 else None)
+            if value is None:
+                sys.exit(1)
+            print(value)
+        elif command == "set" and len(rest) == 3:
+            store.set(*rest)
+        elif command == "incr" and len(rest) in (2, 3):
+            print(store.incr(rest[0], rest[1], int(rest[2]) if len(rest) == 3 else 1))
+        elif command == "cas" and len(rest) == 4:
+            if not store.cas(rest[0], rest[1], rest[2] or None, rest[3]):
+                sys.exit(1)
+        elif command == "del" and len(rest) in (1, 2):
+            store.delete(*rest)
+        elif command == "pane-capture" and len(rest) <= 1:
+            session = rest[0] if rest else read_hook_session()
+            key = current_pane_key()
+            if key and session:
+                store.map_pane(key, session)
+                print(key)
+            if not rest:
+                # hooks call this once per session start/end: tidy up then
+                store.cleanup()
+        elif command == "pane-lookup" and not rest:
+            key = current_pane_key()
+            session = key and store.pane_session(key)
+            if not session:
+                sys.exit(1)
+            print(f"{key}\t{session}")
+        elif command == "pane-get" and len(rest) == 1:
+            session = store.pane_session(rest[0])
+            if not session:
+                sys.exit(1)
+            print(session)
+        elif command == "pane-set" and len(rest) == 2:
+            store.map_pane(*rest)
+        elif command == "pane-history":
+            limit = 20
+            if "-n" in rest:
+                i = rest.index("-n")
+                limit = int(rest[i + 1])
+                del rest[i:i + 2]
+            for pane, session, at in store.pane_history(rest[0] if rest else None, limit):
+                print(f"{time.strftime('%Y-%m-%d %H:%M', time.localtime(at))}\t{pane}\t{session}")
+        elif command == "gc":
+            days = float(rest[rest.index("--days") + 1]) if "--days" in rest else STATE_TTL_DAYS
+            print(f"removed {store.cleanup(days)} row(s)")
+        else:
+            usage(1)
+
+if __name__ == "__main__":
+    main()
@@ -5,17 +5,20 @@ gets start time from subagent's transcript (first entry timestamp)
 """
 import json
 import os
-import subprocess
 import sys
 import time
 from datetime import datetime
 
+sys.path.insert(0, os.path.dirname(os.path.realpath(__file__)))
+from hooklib import HookBudget
+
 JOBS_DONE_PATH = os.environ.get(
     "CLAUDE_JOBSDONE_SOUND",
     os.path.expanduser("~/.claude/sounds/jobsdone.mp3")
 )
 MIN_DURATION = 300  # 5 minutes
 DEBUG_LOG = "/tmp/subagent-notify-debug.log"
+BUDGET_MS = 500
 
 def log(msg):
     with open(DEBUG_LOG, "a") as f:
@@ -36,10 +39,12 @@ def get_start_time(transcript_path):
     return None
 
 def main():
+    budget = HookBudget("subagent-notify", BUDGET_MS)
     log("hook called")
     try:
         input_data = json.load(sys.stdin)
         log(f"input keys: {list(input_data.keys())}")
+        budget.set_context(session_id=input_data.get("session_id"))
     except Exception as e:
         log(f"json parse error: {e}")
         sys.exit(0)
@@ -61,7 +66,8 @@ def main():
 
     if duration >= MIN_DURATION:
         log("playing sound!")
-        subprocess.run(["afplay", JOBS_DONE_PATH], stderr=subprocess.DEVNULL)
+        # detached: the sound outlives the hook instead of stalling it
+        budget.spawn(["afplay", JOBS_DONE_PATH])
     else:
         log("below threshold, no sound")
 
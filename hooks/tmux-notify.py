@@ -4,18 +4,21 @@ tmux-notify hook - speaks which session/window claude finished in
 plays bass_rumble.wav first, then espeak says location
 """
 import os
-import subprocess
 import sys
 import time
 
+sys.path.insert(0, os.path.dirname(os.path.realpath(__file__)))
+from hooklib import HookBudget
+
 RUMBLE_PATH = os.environ.get(
     "CLAUDE_NOTIFY_SOUND",
     os.path.expanduser("~/.claude/sounds/notify.wav")
 )
 RUMBLE_DURATION = 0.64
 OVERLAP = 0.06
+BUDGET_MS = 500
 
-def get_tmux_info():
+def get_tmux_info(budget):
     """get window, pane, and whether this window is active"""
     try:
         # use TMUX_PANE to target the pane where claude is running
@@ -23,44 +26,31 @@ def get_tmux_info():
         pane_id = os.environ.get("TMUX_PANE", "")
         target = ["-t", pane_id] if pane_id else []
 
-        window = subprocess.check_output(
-            ["tmux", "display"] + target + ["-p", "#W"],
-            stderr=subprocess.DEVNULL
-        ).decode().strip()
-
-        pane_index = subprocess.check_output(
-            ["tmux", "display"] + target + ["-p", "#P"],
-            stderr=subprocess.DEVNULL
-        ).decode().strip()
-
-        pane_title = subprocess.check_output(
-            ["tmux", "display"] + target + ["-p", "#{pane_title}"],
-            stderr=subprocess.DEVNULL
-        ).decode().strip()
+        # one tmux round trip for all four fields
+        out = budget.check_output(
+            ["tmux", "display"] + target + ["-p", "#W\t#P\t#{pane_title}\t#{window_active}"]
+        )
+        window, pane_index, pane_title, window_active = out.rstrip("\n").split("\t")
 
         # use title if set, otherwise index
         pane = pane_title if pane_title and pane_title != "" else f"pane {pane_index}"
 
-        # check if this window is the active one
-        window_active = subprocess.check_output(
-            ["tmux", "display"] + target + ["-p", "#{window_active}"],
-            stderr=subprocess.DEVNULL
-        ).decode().strip()
-
         return window, pane, pane_index, window_active == "1"
     except:
         return None, None, None, False
 
 def main():
+    budget = HookBudget("tmux-notify", BUDGET_MS)
+
     # play rumble (non-blocking)
-    subprocess.Popen(["afplay", RUMBLE_PATH], stderr=subprocess.DEVNULL)
-    time.sleep(RUMBLE_DURATION - OVERLAP)
+    started = time.monotonic()
+    budget.spawn(["afplay", RUMBLE_PATH])
 
     # only espeak if inside tmux
     if not os.environ.get("TMUX"):
         sys.exit(0)
 
-    window, pane, pane_index, is_active_window = get_tmux_info()
+    window, pane, pane_index, is_active_window = get_tmux_info(budget)
     if not window:
         sys.exit(0)
 
@@ -75,15 +65,13 @@ def main():
     with open("/tmp/claude-alert.log", "a") as f:
         f.write(f"{text}\n")
 
-    # espeak the location
-    subprocess.run([
-        "espeak",
-        "-v", "en+m7",
-        "-s", "88",
-        "-p", "0",
-        "-a", "75",
-        text
-    ], stderr=subprocess.DEVNULL)
+    # espeak the location once the rumble is nearly done. the wait and the
+    # speech happen in a detached shell so the Stop hook returns right away
+    delay = max(0.0, RUMBLE_DURATION - OVERLAP - (time.monotonic() - started))
+    budget.spawn([
+        "sh", "-c", 'sleep "$0"; exec espeak -v en+m7 -s 88 -p 0 -a 75 "$1"',
+        f"{delay:.2f}", text
+    ])
 
     sys.exit(0)
 
@@ -4,9 +4,16 @@ vibe check hook - detects when claude is being too corporate/formal
 and gently reminds it to chill per CLAUDE.md guidelines
 """
 import json
+import os
 import sys
 import re
 
+sys.path.insert(0, os.path.dirname(os.path.realpath(__file__)))
+from hooklib import HookBudget
+
+# a skipped vibe check is harmless; a stalled Stop hook is not
+BUDGET_MS = 1000
+
 # corporate speak patterns that indicate formality creep
 CORPORATE_PATTERNS = [
     r"I'd be happy to",
@@ -114,10 +121,12 @@ def check_excessive_formality(text):
     return ratio > 0.8
 
 def main():
+    budget = HookBudget("vibe-check", BUDGET_MS)
     try:
         input_data = json.load(sys.stdin)
     except:
         sys.exit(0)
+    budget.set_context(session_id=input_data.get("session_id"))
 
     transcript_path = input_data.get("transcript_path")
     if not transcript_path: